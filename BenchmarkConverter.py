@@ -0,0 +1,240 @@
+"""
+ Benchmark for the JavaScript stub converter. Generates synthetic Bitwig-style stubs
+ and measures parsing and rendering of ClassParser, Method and Comment on corpora
+ scaled from the size of the real API.
+"""
+from os import makedirs
+from os.path import join
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+
+import ConvertJsStubsToTs as converter
+
+# Shape of the Bitwig Studio 1.3 stubs the synthetic corpus is modelled on
+real_class_count = 87
+real_max_methods = 14
+real_extends_ratio = 0.5
+
+param_types = ['int', 'double', 'long', 'boolean', 'string', 'function', 'byte[]', 'float', 'Track',
+               'Clip', 'ClipLauncherSlots', 'Value']
+return_types = ['int', 'double', 'boolean', 'string', 'byte[]', 'Track', 'Clip', 'Value', 'RangedValue']
+words = ['the', 'value', 'track', 'clip', 'of', 'returns', 'a', 'callback', 'is', 'called', 'when',
+         'Bitwig', 'Studio', 'registers', 'an', 'observer', 'that', 'reports', 'current', 'index',
+         'slot', 'bank', 'scroll', 'position', 'in', 'this', 'object', '{@link', 'Transport}', 'or']
+
+
+def sentence(rng, count):
+    return ' '.join(rng.choice(words) for _ in range(count))
+
+
+def generate_stub(rng, class_name, super_name):
+    """
+    Returns the text of a stub file defining class_name with a random number of methods.
+    """
+    lines = ['/* API Version - 1.3 */', '', '/**']
+    for _ in range(rng.randint(1, 4)):
+        lines.append(' * ' + sentence(rng, rng.randint(4, 14)))
+    lines += [' *', ' * @since Bitwig Studio 1.0', ' */', 'function ' + class_name + '() {}', '']
+    if super_name:
+        lines.append(class_name + '.prototype = new ' + super_name + '();')
+        lines.append(class_name + '.prototype.constructor = ' + class_name + ';')
+        lines.append('')
+
+    for idx in range(rng.randint(0, real_max_methods)):
+        params = ['param' + str(p) for p in range(rng.choice((0, 0, 1, 1, 1, 2, 3)))]
+        lines.append('/**')
+        for _ in range(rng.randint(1, 4)):
+            lines.append(' * ' + sentence(rng, rng.randint(4, 14)))
+        lines.append(' *')
+        for param in params:
+            lines.append(' * @param {' + rng.choice(param_types) + '} ' + param + ' ' + sentence(rng, 5))
+        if rng.random() < 0.6:
+            lines.append(' * @return {' + rng.choice(return_types) + '} ' + sentence(rng, 4))
+        lines.append(' * @since Bitwig Studio 1.' + str(rng.randint(0, 3)))
+        lines.append(' */')
+        lines.append(class_name + '.prototype.method' + str(idx) + ' = function(' + ', '.join(params) + ') {};')
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_corpus(scale, seed=0):
+    """
+    Returns a list of (filename, text) tuples with scale times as many stubs as the real API.
+    About half of the classes extend one of the classes generated before them.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    names = []
+    for idx in range(int(real_class_count * scale)):
+        class_name = 'Synthetic' + str(idx)
+        super_name = rng.choice(names) if names and rng.random() < real_extends_ratio else None
+        names.append(class_name)
+        corpus.append((class_name + '.js', generate_stub(rng, class_name, super_name)))
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    makedirs(directory, exist_ok=True)
+    for filename, text in corpus:
+        with open(join(directory, filename), 'w') as file:
+            file.write(text)
+
+
+def split_corpus(corpus):
+    """
+    Pre-splits the corpus the way ClassParser sees it, so Comment and Method can be measured
+    on their own. Returns the comment blocks and (class name, definition tokens, comment lines)
+    tuples of all methods.
+    """
+    comments = []
+    methods = []
+    for _, text in corpus:
+        class_name = None
+        block = []
+        for line in text.split('\n'):
+            sline = line.strip()
+            if sline.startswith('/**'):
+                block = [sline]
+            elif block and not block[-1].startswith('*/'):
+                block.append(sline)
+                if sline.startswith('*/'):
+                    comments.append(block)
+            elif sline.startswith('function'):
+                class_name = converter.non_word_pattern.split(sline, 2)[1]
+            elif class_name and sline.startswith(class_name + '.prototype.'):
+                tokens = [s for s in converter.definition_token_pattern.findall(sline) if s.strip()]
+                if tokens[2] != 'constructor':
+                    methods.append((class_name, tokens, block))
+    return comments, methods
+
+
+def build_comment(lines):
+    comment = converter.Comment()
+    for line in lines:
+        comment.add_line(line)
+        if '@param' in line or '@return' in line:
+            comment.parse_annotation(line)
+    return comment
+
+
+def measure(function, repeat):
+    """
+    Returns the best wall clock time of repeat runs and the peak traced memory of one
+    more run together with the result of the last run.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def benchmark(corpus, repeat):
+    """
+    Measures ClassParser, Method and Comment on the corpus. Returns a list of rows
+    (component, parse seconds, render seconds, peak bytes, files per second).
+    """
+    files = len(corpus)
+    comments, methods = split_corpus(corpus)
+    resolver = converter.TypeResolver()
+    rows = []
+
+    def parse_classes():
+        return [converter.parse_stub(text, filename) for filename, text in corpus]
+
+    def render_classes(parsers):
+        chunks = [converter.head]
+        for p in parsers:
+            p.render(chunks, resolver=resolver)
+        return "".join(chunks)
+
+    parse_time, parse_peak, parsers = measure(parse_classes, repeat)
+    render_time, render_peak, _ = measure(lambda: render_classes(parsers), repeat)
+    rows.append(('ClassParser', parse_time, render_time, max(parse_peak, render_peak),
+                 files / (parse_time + render_time)))
+
+    # Method only reads its comment, so the comments are built once up front
+    method_inputs = [(class_name, tokens, build_comment(lines)) for class_name, tokens, lines in methods]
+
+    def parse_methods():
+        return [converter.Method(class_name, tokens, comment) for class_name, tokens, comment in method_inputs]
+
+    def render_methods(parsed):
+        chunks = []
+        for method in parsed:
+            method.render(chunks, resolver=resolver)
+        return chunks
+
+    parse_time, parse_peak, parsed = measure(parse_methods, repeat)
+    render_time, render_peak, _ = measure(lambda: render_methods(parsed), repeat)
+    rows.append(('Method', parse_time, render_time, max(parse_peak, render_peak),
+                 files / (parse_time + render_time)))
+
+    def render_comments(parsed):
+        return "".join("    " + line + "\n" for comment in parsed for line in comment.get_comments())
+
+    parse_time, parse_peak, parsed = measure(lambda: [build_comment(lines) for lines in comments], repeat)
+    render_time, render_peak, _ = measure(lambda: render_comments(parsed), repeat)
+    rows.append(('Comment', parse_time, render_time, max(parse_peak, render_peak),
+                 files / (parse_time + render_time)))
+    return rows
+
+
+def benchmark_convert(corpus, repeat):
+    """
+    Measures a whole convert() run including reading the stubs and writing the
+    definition file, without the cache.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        stub_dir = join(directory, 'stubs')
+        write_corpus(corpus, stub_dir)
+        out_path = join(directory, 'out.d.ts')
+        total, peak, _ = measure(lambda: converter.convert(stub_dir, out_path, cache_dir=None), repeat)
+    return 'convert', total, None, peak, len(corpus) / total
+
+
+def print_table(scale, files, rows):
+    print("scale %gx, %d stubs" % (scale, files))
+    print("  %-12s %12s %12s %12s %12s" % ('component', 'parse ms', 'render ms', 'peak KiB', 'files/s'))
+    for name, parse_time, render_time, peak, rate in rows:
+        render = '%12.1f' % (render_time * 1000) if render_time is not None else '%12s' % '-'
+        print("  %-12s %12.1f %s %12d %12.0f" % (name, parse_time * 1000, render, peak // 1024, rate))
+    print()
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Measures the stub converter on synthetic Bitwig-style stubs.')
+    argparser.add_argument('-s', '--scale', type=float, nargs='+', default=[1, 10],
+                           help='corpus sizes relative to the real API, for example 1 10 100 (default: 1 10)')
+    argparser.add_argument('-r', '--repeat', type=int, default=3,
+                           help='runs per measurement, the fastest one is reported (default: %(default)s)')
+    argparser.add_argument('--seed', type=int, default=0, help='seed of the corpus generator')
+    argparser.add_argument('--write', metavar='DIR',
+                           help='only write the corpus of the first scale to DIR, '
+                                'for example to run the converter on it')
+    args = argparser.parse_args()
+
+    if args.write:
+        write_corpus(generate_corpus(args.scale[0], args.seed), args.write)
+        return
+
+    for scale in args.scale:
+        corpus = generate_corpus(scale, args.seed)
+        rows = benchmark(corpus, args.repeat)
+        rows.append(benchmark_convert(corpus, args.repeat))
+        print_table(scale, len(corpus), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,413 +1,1770 @@
-from os import listdir
-from os.path import isfile, join
-from sys import platform
-
-import re
-
-"""
- Program that converts JavaScripts Stubs for Bitwig Studio Controller API into a
- Typescript Definition File.
-"""
-__author__ = "Eric Ahrens"
-__version__ = "1.0.0"
-__maintainer__ = "Eric Ahrens"
-__email__ = "eric.n.ahrens@gmail.com"
-
-if platform == "darwin":
-    stubspath = "/Applications/Bitwig Studio.app/Contents/Resources/Documentation/control-surface/js-stubs"
-elif platform == "win32":
-    stubspath = "C:/Program Files (x86)/Bitwig Studio/resources/doc/control-surface/js-stubs"
-
-result_filename = "BitwigControllerApi.d.ts"
-with_comments = True
-with_types = True
-
-head = "declare function loadAPI(val: number): void;\n" \
-       "declare function println(s : string) : void;\n" \
-       "declare function load(file: string) : void;\n" \
-       "declare var host : Host;\n\n" \
-       "declare enum CursorNavigationMode  {\n" \
-       "	NESTED = 0,\n" \
-       "	FLAT,\n" \
-       "	GUI,\n" \
-       "}\n"
-
-parameterPaths = {
-    'MidiIn.createNoteInput./*': -1,
-    'MidiIn.createNoteInput.*/masks': '...masks: string[]',
-    'MidiIn.setMidiCallback.callback': 'callback : (status: number, data1: number, data2: number) => void',
-    'Application.addHasActiveEngineObserver.callable': 'callable : (engineactive : boolean) => void',
-    'Application.addProjectNameObserver.callback': 'callback : (name : string) => void',
-    'Application.addPanelLayoutObserver.callable': 'callable : (layoutName : string) => void',
-    'Application.addDisplayProfileObserver.callable': 'callable : (profileName : string) => void',
-    'AutomatableRangedValue.addNameObserver.callback': 'callback : (name : string) => void',
-    'AutomatableRangedValue.addValueDisplayObserver.callback': 'callback : (displayValue : string) => void',
-    'BeatTime.addTimeObserver.callback': 'callback : (timeFloat : number) => void',
-    'BeatTime.addRawValueObserver.callback': 'callback : (floatValue : number) => void',
-    'Browser.addIsBrowsingObserver.callback': 'callback : (isbrowsing : boolean) => void',
-    'BrowserColumn.addExistsObserver.callback': 'callback : (exists : boolean ) => void',
-    'BrowserColumn.addEntryCountObserver.callback': 'callback : (count: number ) => void',
-    'BrowserFilterColumn.addNameObserver.callback': 'callback : (name: string ) => void',
-    'BrowserFilterColumnBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'BrowserFilterColumnBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowserFilterColumnBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowserFilterColumnBank.addEntryCountObserver.callback': 'callback : (count: number) => void',
-    'BrowserFilterItem.addHitCountObserver.callback': 'callback : (count: number) => void',
-    'BrowserItem.addExistsObserver.callback': 'callback : (exists: boolean ) => void',
-    'BrowserItem.addValueObserver.callback': 'callback : (value: string) => void',
-    'BrowserItemBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'BrowserItemBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowserItemBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowsingSession.addIsAvailableObserver.callback': 'callback : (available: boolean) => void',
-    'BrowsingSession.addIsActiveObserver.callback': 'callback : (active: boolean ) => void',
-    'BrowsingSession.addHitCountObserver.callback': 'callback : (hitcount: number ) => void',
-    'BrowsingSessionBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'BrowsingSessionBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowsingSessionBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
-    'BrowsingSessionBank.addEntryCountObserver.callback': 'callback : (count: number ) => void',
-    'Channel.addVuMeterObserver.callback': 'callback : (value : number) => void',
-    'Channel.addNoteObserver.callback': 'callback : (onoff: boolean, key: number, velocity: number) => void',
-    'Channel.addColorObserver.callback': 'callback : (red: number, green: number, blue: number) => void',
-    'Channel.addIsSelectedInMixerObserver.callback': 'callback : (selected: boolean ) => void',
-    'ChannelBank.addChannelScrollPositionObserver.callback': 'callback : (position: number ) => void',
-    'ChannelBank.addCanScrollChannelsUpObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'ChannelBank.addCanScrollChannelsDownObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'ChannelBank.addChannelCountObserver.callback': 'callback : ( count: number) => void',
-    'ChannelBank.addCanScrollSendsUpObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'ChannelBank.addCanScrollSendsDownObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'ChannelBank.addSendCountObserver.callback': 'callback : (count: number ) => void',
-    'Clip.addCanScrollKeysUpObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'Clip.addCanScrollKeysDownObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'Clip.addCanScrollStepsBackwardsObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'Clip.addCanScrollStepsForwardObserver.callback': 'callback : (canscroll: boolean ) => void',
-    'Clip.addStepDataObserver.callback': 'callback : (x: number, y: number, state: number ) => void',
-    'Clip.addPlayingStepObserver.callback': 'callback : (steppos: number) => void',
-    'Clip.addColorObserver.callback' : 'callback : (red: number, green: number, blue: number ) => void',
-    'Scene.addClipCountObserver.callback' : 'callback : (count: number) => void',
-    'ClipLauncherScenesOrSlots.addNameObserver.callback': 'callback : (name: string) => void',
-    'ClipLauncherSlots.addIsSelectedObserver.callback': 'callback : (index: number, selected: boolean) => void',
-    'ClipLauncherSlots.addHasContentObserver.callback': 'callback : (index: number, hasContent: boolean ) => void',
-    'ClipLauncherSlots.addPlaybackStateObserver.callback': 'callback : (index: number, state: number, queued: boolean) => void',
-    'ClipLauncherSlots.addIsPlayingObserver.callback': 'callback : (index: number, playing: boolean) => void',
-    'ClipLauncherSlots.addIsRecordingObserver.callback': 'callback : (index: number, recording: boolean) => void',
-    'ClipLauncherSlots.addIsPlaybackQueuedObserver.callback': 'callback : (index: number, playbackQueued: boolean) => void',
-    'ClipLauncherSlots.addIsRecordingQueuedObserver.callback': 'callback : (index: number, recordingQueued: boolean) => void',
-    'ClipLauncherSlots.addIsStopQueuedObserver.callback': 'callback : (index: number, stopQueued: boolean) => void',
-    'ClipLauncherSlots.addColorObserver.callback': 'callback : (index: number, red: number, green: number, blue: number) => void',
-    'Cursor.addCanSelectPreviousObserver.callback': 'callback : (canSelect: boolean) => void',
-    'Cursor.addCanSelectNextObserver.callback': 'callback : (canSelect: boolean) => void',
-    'Device.addPositionObserver.callback': 'callback : (position: number) => void',
-    'Device.addHasSelectedDeviceObserver.callback': 'callback : (hasSelectedDevice: boolean) => void',
-    'Device.addIsPluginObserver.callback': 'callback : (isPlugin: boolean) => void',
-    'Device.addPreviousParameterPageEnabledObserver.callback': 'callback : (enabled: boolean) => void',
-    'Device.addNextParameterPageEnabledObserver.callback': 'callback : (enabled: boolean) => void',
-    'Device.addNameObserver.callback': 'callback : (name: string) => void',
-    'Device.addPresetNameObserver.callback': 'callback : (name: string) => void',
-    'Device.addPresetCategoryObserver.callback': 'callback : (category: string) => void',
-    'Device.addPresetCreatorObserver.callback': 'callback : (name: string) => void',
-    'Device.addSelectedPageObserver.callback': 'callback : (index: number) => void',
-    'Device.addActiveModulationSourceObserver.callback': 'callback : (name: string) => void',
-    'Device.addPageNamesObserver.callback': 'callback : (name: string) => void',
-    'Device.addPresetNamesObserver.callback': 'callback : (names: string[]) => void',
-    'Device.addPresetCategoriesObserver.callback': 'callback : (categories: string[]) => void',
-    'Device.addPresetCreatorsObserver.callback': 'callback : (creators: string[]) => void',
-    'Device.addIsEnabledObserver.callback': 'callback : (enabled: boolean) => void',
-    'Device.addSlotsObserver.callback': 'callback : (slotnames: string[]) => void',
-    'Device.addDirectParameterIdObserver.callback': 'callback : (parameterIds: string[]) => void',
-    'Device.addDirectParameterNameObserver.callback': 'callback : (id: string, name: string) => void',
-    'Device.addDirectParameterValueDisplayObserver.callback': 'callback : (id: string, valueDisplay: string) => void',
-    'Device.addDirectParameterNormalizedValueObserver.callback': 'callback : (id: string, value: number) => void',
-    'Device.addSampleNameObserver.callback': 'callback : (name: string) => void',
-    'DeviceBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'DeviceBank.addCanScrollUpObserver.callback': 'callback : (canScroll: boolean) => void',
-    'DeviceBank.addCanScrollDownObserver.callback': 'callback : (canScroll: boolean) => void',
-    'DeviceBank.addDeviceCountObserver.callback': 'callback : (count: number) => void',
-    'DeviceChain.addNameObserver.callback': 'callback : (name: string) => void',
-    'DeviceChain.addIsSelectedInEditorObserver.callback': 'callback : (selected: boolean) => void',
-    'GenericBrowsingSession.addNameObserver.callback': 'callback : (name: string) => void',
-    'Host.scheduleTask.callback': 'callback : (connection: RemoteConnection ) => void',
-    'Host.connectToRemoteHost.callback': 'callback : ( ) => void',
-    'Host.addDatagramPacketObserver.callback': 'callback : (data) => void',
-    'Macro.addLabelObserver.callback': 'callback : (name: string) => void',
-    'MidiIn.setSysexCallback.callback': 'callback : (data: string) => void',
-    'ModulationSource.addIsMappingObserver.callback': 'callback : (isMapping: boolean) => void',
-    'ModulationSource.addNameObserver.callback': 'callback : (name: string) => void',
-    'ModulationSource.addIsMappedObserver.callback': 'callback : (mapped: boolean) => void',
-    'NoteLane.addNoteValueObserver.callback': 'callback : (value: number) => void',
-    'NoteLane.addNameObserver.callback': 'callback : (name: string ) => void',
-    'NoteLane.addColorObserver.callback': 'callback : (red: number, green: number, blue: number) => void',
-    'PrimaryDevice.addCanSwitchToDeviceObserver.callback': 'callback : (canSwitch: boolean) => void',
-    'RangedValue.addValueObserver.callback': 'callback : (value: number) => void',
-    'RangedValue.addRawValueObserver.callback': 'callback : (value: number) => void',
-    'RemoteConnection.setDisconnectCallback.callback': 'callback : ( ) => void',
-    'RemoteConnection.setReceiveCallback.callback': 'callback : (data: number[]) => void',
-    'RemoteSocket.setClientConnectCallback.callback': 'callback : (connection: RemoteConnection) => void',
-    'Scene.addPositionObserver.callback': 'callback : (position: number) => void',
-    'Scene.addIsSelectedInEditorObserver.callback': 'callback : (selected: boolean) => void',
-    'SceneBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'SceneBank.addCanScrollUpObserver.callback': 'callback : (canScroll: boolean) => void',
-    'SceneBank.addCanScrollDownObserver.callback': 'callback : (canScroll: boolean) => void',
-    'SceneBank.addSceneCountObserver.callback': 'callback : (count: number) => void',
-    'Signal.addSignalObserver.callback': 'callback : ( ) => void',
-    'Track.addPositionObserver.callback': 'callback : (postion: number) => void',
-    'Track.addIsQueuedForStopObserver.callback': 'callback : (queued: boolean) => void',
-    'Track.addPitchNamesObserver.callback': 'callback : (key: number, name: string) => void',
-    'Track.addTrackTypeObserver.callback': 'callback : (type: string) => void',
-    'Track.addIsGroupObserver.callback': 'callback : (group: boolean) => void',
-    'TrackBank.addSceneScrollPositionObserver.callback': 'callback : (position: number) => void',
-    'TrackBank.addCanScrollScenesUpObserver.callback': 'callback : (canScroll: boolean) => void',
-    'TrackBank.addCanScrollScenesDownObserver.callback': 'callback : (canScroll: boolean) => void',
-    'TrackBank.addSceneCountObserver.callback': 'callback : (count: number) => void',
-    'Transport.addIsPlayingObserver.callback': 'callback : (playing: boolean) => void',
-    'Transport.addIsRecordingObserver.callback': 'callback : (recording: boolean) => void',
-    'Transport.addOverdubObserver.callback': 'callback : (overdub: boolean) => void',
-    'Transport.addLauncherOverdubObserver.callback': 'callback : (overdub: boolean) => void',
-    'Transport.addAutomationWriteModeObserver.callback': 'callback : (mode: string) => void',
-    'Transport.addIsWritingArrangerAutomationObserver.callback': 'callback : (writeEnabled: boolean) => void',
-    'Transport.addIsWritingClipLauncherAutomationObserver.callback': 'callback : (writingClipLauncher: boolean) => void',
-    'Transport.addAutomationOverrideObserver.callback': 'callback : (automationOverride: boolean) => void',
-    'Transport.addIsLoopActiveObserver.callback': 'callback : (loopActive: boolean) => void',
-    'Transport.addPunchInObserver.callback': 'callback : (enabled: boolean) => void',
-    'Transport.addPunchOutObserver.callback': 'callback : (enabled: boolean ) => void',
-    'Transport.addClickObserver.callback': 'callback : (active: boolean) => void',
-    'Transport.addMetronomeTicksObserver.callback': 'callback : (active: boolean) => void',
-    'Transport.addMetronomeVolumeObserver.callback': 'callback : (value: number) => void',
-    'Transport.addPreRollClickObserver.callback': 'callback : (enabled: boolean) => void',
-    'Transport.addPreRollObserver.callback': 'callback : (enabled: boolean) => void',
-    'Transport.addClipLauncherPostRecordingActionObserver.callback': 'callback : (status: string) => void',
-    'Value.addValueObserver.callback': 'callback : (value) => void',
-}
-
-functionPaths = {
-    'BooleanValue.toggle': 'exclusive?'
-}
-
-filelist = [f for f in listdir(stubspath) if isfile(join(stubspath, f))]
-
-resultfile = open(result_filename, 'w')
-
-parsers = []
-
-
-class Parameter:
-    def __init__(self, name, comment=None):
-        self.__name = name
-        self.__type = comment.get_type(name)
-
-    def overwrite(self, paramdisp):
-        self.__name = paramdisp
-        self.__type = None
-
-    @property
-    def name(self):
-        return self.__name
-
-    @property
-    def type_str(self):
-        return self.__type
-
-    @property
-    def type(self):
-        if self.__type == 'function':
-            return '() => void'
-        if self.__type == 'byte[]':
-            return 'number[]'
-        if self.__type == 'int' or self.__type == 'double' or self.__type == 'long' or self.__type == 'byte':
-            return 'number'
-        return self.__type
-
-
-class Method:
-    def __init__(self, className, deflist, comment):
-        self.__name = None
-        self.__parameters = []
-        self.__constructor = False
-        self.__name = deflist[2]
-        self.__returntype = comment.get_return_type()
-        self.__lines = comment.get_comments()
-        if self.__name == 'constructor':
-            self.__constructor = True
-            for idx in range(3, len(deflist)):
-                self.__parameters.append(Parameter(deflist[idx], comment))
-        else:
-            for idx in range(4, len(deflist)):
-                param = Parameter(deflist[idx], comment)
-                qpath = className + "." + self.__name + "." + param.name
-                if qpath in parameterPaths and with_types:
-                    ref = parameterPaths[qpath]
-                    if ref != -1:
-                        param.overwrite(ref)
-                        self.__parameters.append(param)
-                else:
-                    self.__parameters.append(param)
-                    if param.type_str == 'function':
-                        print ("    \'" + className + "." + self.__name + "." + param.name + "' : '" + param.name + " : ( ) => void',")
-
-    def is_constructor(self):
-        return self.__constructor
-
-    def constr_param(self):
-        if self.__constructor and len(self.__parameters) > 0:
-            return self.__parameters[0].name
-        return None
-
-    def render(self, file, class_name):
-        if not self.__constructor:
-            if with_comments:
-                for cl in self.__lines:
-                    file.write("    " + cl + "\n")
-
-            file.write("     " + self.__name + "(")
-            q_path = class_name + "." + self.__name
-            if q_path in functionPaths and with_types:
-                file.write(functionPaths[q_path])
-            else:
-                for idx, parameter in enumerate(self.__parameters):
-                    if parameter.type and with_types:
-                        file.write(parameter.name + " : " + parameter.type)
-                    else:
-                        file.write(parameter.name)
-                    if idx < len(self.__parameters) - 1:
-                        file.write(", ")
-            if with_types:
-                if self.__returntype:
-                    file.write(") : " + self.__returntype)
-                else:
-                    file.write(") : void")
-            else:
-                file.write(")")
-
-class Comment:
-    def __init__(self):
-        self.__return_type = None
-        self.__paramDict = {}
-        self.__lines = []
-
-    def set_return_type(self, type):
-        self.__return_type = re.sub('[\{\}]', '', type)
-
-    def get_return_type(self):
-        if self.__return_type == 'function':
-            return '() => void'
-        if self.__return_type == 'byte[]':
-            return 'number[]'
-        if self.__return_type == 'int' or self.__return_type == 'double' or self.__return_type == 'long' or self.__return_type == 'byte':
-            return 'number'
-        return self.__return_type
-
-    def register_type(self, type, paramname):
-        self.__paramDict[paramname] = re.sub('[\{\}]', '', type)
-
-    def get_type(self, param_name):
-        if param_name in self.__paramDict:
-            return self.__paramDict[param_name]
-        return None
-
-    def add_line(self, line):
-        self.__lines.append(line)
-
-    def get_comments(self):
-        return [l for l in self.__lines]
-
-
-class ClassParser:
-    def __init__(self, lines, filename):
-        self.__fileName = filename
-        self.__methods = []
-        self.__className = None
-        self.__super = None
-        self.__class_comment = []
-        funcdef = None
-        constrdef = None
-
-        in_comment_mode = False
-        current_comment = None
-
-        for line in lines:
-            sline = line.strip()
-            if sline.startswith('/**'):
-                in_comment_mode = True
-                current_comment = Comment()
-                current_comment.add_line(sline)
-            elif sline.startswith('*/'):
-                current_comment.add_line(sline)
-                in_comment_mode = False
-            elif in_comment_mode:
-                current_comment.add_line(sline)
-                lineArray = [s for s in re.split(" |\.|\*|=|,|\(|\)|;|\n", sline) if len(s.strip()) > 0]
-                if len(lineArray) > 2:
-                    anotation = lineArray[0]
-                    if anotation.startswith('@return'):
-                        current_comment.set_return_type(lineArray[1])
-                    elif anotation.startswith('@param'):
-                        current_comment.register_type(lineArray[1], lineArray[2])
-            if sline.startswith('var'):
-                # print " ###### " + line
-                pass
-            elif sline.startswith('function'):
-                # print line
-                m = re.split('\W+', sline)
-                if m and len(m) > 1:
-                    self.__className = m[1]
-                    funcdef = m[1] + '.prototype.'
-                    constrdef = m[1] + '.prototype'
-                    self.__class_comment = current_comment.get_comments()
-                    # print "[" + self.__className + "]"
-            elif self.__className and line.startswith(funcdef):
-                lineArray = [s for s in re.split(" |\.|=|,|\(|\)|\{|\}|;|\n", sline) if len(s.strip()) > 0]
-                if len(lineArray) > 3:
-                    method = Method(self.__className, lineArray, current_comment)
-                    if not method.is_constructor():
-                        self.__methods.append(method)
-                else:
-                    print (" <<<<<<<<<<<<<<<<<<<< FAIL >>>>>>>>>>>>>>> ")
-            elif constrdef and line.startswith(constrdef):
-                lineArray = [s for s in re.split(" |\.|=|,|\(|\)|\{|\}|;|\n", sline) if len(s.strip()) > 0]
-                if len(lineArray) > 3:
-                    self.__super = lineArray[3]
-
-    @property
-    def name(self):
-        return self.__className
-
-    @property
-    def filename(self):
-        return self.__fileName
-
-    def render(self, file):
-        if not self.name:
-            return
-        if with_comments:
-            for cl in self.__class_comment:
-                file.write(cl + "\n")
-
-        file.write('interface ' + p.name)
-        if self.__super:
-            file.write(' extends ' + self.__super)
-        file.write(' {\n')
-        for idx, method in enumerate(self.__methods):
-            method.render(file, self.__className)
-            if idx < len(self.__methods) - 1:
-                file.write(",\n")
-        if with_comments:
-            file.write("\n")
-
-        file.write('}\n\n')
-
-
-def readFile(filename):
-    # print " ###### Reading FILE: " + filename + " ############ "
-    with open(stubspath + "/" + filename) as file:
-        content = file.readlines()        # print " LINES = " + str(len(content))
-        parsers.append(ClassParser(content, filename))
-
-
-for f in filelist:
-    readFile(f)
-
-resultfile.write(head);
-for p in parsers:
-    p.render(resultfile)
-
-resultfile.close()
-print("Created Typescript definition File: " + result_filename)
+"""
+ Program that converts JavaScripts Stubs for Bitwig Studio Controller API into a
+ Typescript Definition File.
+
+ Can also be imported, convert() runs a whole conversion and parse_stub() parses
+ the text of a single stub file.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from itertools import islice
+from os import O_CREAT, O_EXCL, O_WRONLY, cpu_count, listdir, makedirs, remove, replace, scandir, urandom, utime
+from os import environ
+from os import open as open_fd
+from os.path import abspath, basename, dirname, expanduser, isfile, join, splitext
+from sys import platform
+
+import argparse
+import hashlib
+import heapq
+import io
+import json
+import mmap
+import pickle
+import re
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    # watch mode falls back to polling the stub directory
+    INotify = None
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, --stats reports no peak memory there
+    resource = None
+
+try:
+    from os import O_BINARY
+except ImportError:
+    # only Windows distinguishes text and binary file descriptors
+    O_BINARY = 0
+
+__author__ = "Eric Ahrens"
+__version__ = "1.0.0"
+__maintainer__ = "Eric Ahrens"
+__email__ = "eric.n.ahrens@gmail.com"
+
+if platform == "darwin":
+    stubspath = "/Applications/Bitwig Studio.app/Contents/Resources/Documentation/control-surface/js-stubs"
+elif platform == "win32":
+    stubspath = "C:/Program Files (x86)/Bitwig Studio/resources/doc/control-surface/js-stubs"
+else:
+    # no default installation location, the stub directory has to be given on the command line
+    stubspath = None
+
+result_filename = "BitwigControllerApi.d.ts"
+# Output directory when writing one file per interface
+result_dirname = "BitwigControllerApi"
+# File in the output directory that references all interface files when writing one file per interface
+index_filename = "index.d.ts"
+with_comments = True
+with_types = True
+
+# Name of the per-user directory holding the parsed class models of previous runs with --cache,
+# nothing is cached unless a cache directory is given
+cache_name = "BitwigApi4Typescript"
+# Number of class models kept in the cache, the ones used least recently are removed first.
+# Enough for every stub of some 40 API versions of several hundred stubs each.
+cache_limit = 20000
+# Bump whenever the parser changes in a way that makes old cache entries invalid
+cache_version = 4
+# Number of stubs read at the same time, helps on network drives and cold caches
+io_threads = 8
+
+head = "declare function loadAPI(val: number): void;\n" \
+       "declare function println(s : string) : void;\n" \
+       "declare function load(file: string) : void;\n" \
+       "declare var host : Host;\n\n" \
+       "declare enum CursorNavigationMode  {\n" \
+       "	NESTED = 0,\n" \
+       "	FLAT,\n" \
+       "	GUI,\n" \
+       "}\n"
+
+parameterPaths = {
+    'MidiIn.createNoteInput./*': -1,
+    'MidiIn.createNoteInput.*/masks': '...masks: string[]',
+    'MidiIn.setMidiCallback.callback': 'callback : (status: number, data1: number, data2: number) => void',
+    'Application.addHasActiveEngineObserver.callable': 'callable : (engineactive : boolean) => void',
+    'Application.addProjectNameObserver.callback': 'callback : (name : string) => void',
+    'Application.addPanelLayoutObserver.callable': 'callable : (layoutName : string) => void',
+    'Application.addDisplayProfileObserver.callable': 'callable : (profileName : string) => void',
+    'AutomatableRangedValue.addNameObserver.callback': 'callback : (name : string) => void',
+    'AutomatableRangedValue.addValueDisplayObserver.callback': 'callback : (displayValue : string) => void',
+    'BeatTime.addTimeObserver.callback': 'callback : (timeFloat : number) => void',
+    'BeatTime.addRawValueObserver.callback': 'callback : (floatValue : number) => void',
+    'Browser.addIsBrowsingObserver.callback': 'callback : (isbrowsing : boolean) => void',
+    'BrowserColumn.addExistsObserver.callback': 'callback : (exists : boolean ) => void',
+    'BrowserColumn.addEntryCountObserver.callback': 'callback : (count: number ) => void',
+    'BrowserFilterColumn.addNameObserver.callback': 'callback : (name: string ) => void',
+    'BrowserFilterColumnBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'BrowserFilterColumnBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowserFilterColumnBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowserFilterColumnBank.addEntryCountObserver.callback': 'callback : (count: number) => void',
+    'BrowserFilterItem.addHitCountObserver.callback': 'callback : (count: number) => void',
+    'BrowserItem.addExistsObserver.callback': 'callback : (exists: boolean ) => void',
+    'BrowserItem.addValueObserver.callback': 'callback : (value: string) => void',
+    'BrowserItemBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'BrowserItemBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowserItemBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowsingSession.addIsAvailableObserver.callback': 'callback : (available: boolean) => void',
+    'BrowsingSession.addIsActiveObserver.callback': 'callback : (active: boolean ) => void',
+    'BrowsingSession.addHitCountObserver.callback': 'callback : (hitcount: number ) => void',
+    'BrowsingSessionBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'BrowsingSessionBank.addCanScrollUpObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowsingSessionBank.addCanScrollDownObserver.callback': 'callback : (canscroll: boolean) => void',
+    'BrowsingSessionBank.addEntryCountObserver.callback': 'callback : (count: number ) => void',
+    'Channel.addVuMeterObserver.callback': 'callback : (value : number) => void',
+    'Channel.addNoteObserver.callback': 'callback : (onoff: boolean, key: number, velocity: number) => void',
+    'Channel.addColorObserver.callback': 'callback : (red: number, green: number, blue: number) => void',
+    'Channel.addIsSelectedInMixerObserver.callback': 'callback : (selected: boolean ) => void',
+    'ChannelBank.addChannelScrollPositionObserver.callback': 'callback : (position: number ) => void',
+    'ChannelBank.addCanScrollChannelsUpObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'ChannelBank.addCanScrollChannelsDownObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'ChannelBank.addChannelCountObserver.callback': 'callback : ( count: number) => void',
+    'ChannelBank.addCanScrollSendsUpObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'ChannelBank.addCanScrollSendsDownObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'ChannelBank.addSendCountObserver.callback': 'callback : (count: number ) => void',
+    'Clip.addCanScrollKeysUpObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'Clip.addCanScrollKeysDownObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'Clip.addCanScrollStepsBackwardsObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'Clip.addCanScrollStepsForwardObserver.callback': 'callback : (canscroll: boolean ) => void',
+    'Clip.addStepDataObserver.callback': 'callback : (x: number, y: number, state: number ) => void',
+    'Clip.addPlayingStepObserver.callback': 'callback : (steppos: number) => void',
+    'Clip.addColorObserver.callback' : 'callback : (red: number, green: number, blue: number ) => void',
+    'Scene.addClipCountObserver.callback' : 'callback : (count: number) => void',
+    'ClipLauncherScenesOrSlots.addNameObserver.callback': 'callback : (name: string) => void',
+    'ClipLauncherSlots.addIsSelectedObserver.callback': 'callback : (index: number, selected: boolean) => void',
+    'ClipLauncherSlots.addHasContentObserver.callback': 'callback : (index: number, hasContent: boolean ) => void',
+    'ClipLauncherSlots.addPlaybackStateObserver.callback': 'callback : (index: number, state: number, queued: boolean) => void',
+    'ClipLauncherSlots.addIsPlayingObserver.callback': 'callback : (index: number, playing: boolean) => void',
+    'ClipLauncherSlots.addIsRecordingObserver.callback': 'callback : (index: number, recording: boolean) => void',
+    'ClipLauncherSlots.addIsPlaybackQueuedObserver.callback': 'callback : (index: number, playbackQueued: boolean) => void',
+    'ClipLauncherSlots.addIsRecordingQueuedObserver.callback': 'callback : (index: number, recordingQueued: boolean) => void',
+    'ClipLauncherSlots.addIsStopQueuedObserver.callback': 'callback : (index: number, stopQueued: boolean) => void',
+    'ClipLauncherSlots.addColorObserver.callback': 'callback : (index: number, red: number, green: number, blue: number) => void',
+    'Cursor.addCanSelectPreviousObserver.callback': 'callback : (canSelect: boolean) => void',
+    'Cursor.addCanSelectNextObserver.callback': 'callback : (canSelect: boolean) => void',
+    'Device.addPositionObserver.callback': 'callback : (position: number) => void',
+    'Device.addHasSelectedDeviceObserver.callback': 'callback : (hasSelectedDevice: boolean) => void',
+    'Device.addIsPluginObserver.callback': 'callback : (isPlugin: boolean) => void',
+    'Device.addPreviousParameterPageEnabledObserver.callback': 'callback : (enabled: boolean) => void',
+    'Device.addNextParameterPageEnabledObserver.callback': 'callback : (enabled: boolean) => void',
+    'Device.addNameObserver.callback': 'callback : (name: string) => void',
+    'Device.addPresetNameObserver.callback': 'callback : (name: string) => void',
+    'Device.addPresetCategoryObserver.callback': 'callback : (category: string) => void',
+    'Device.addPresetCreatorObserver.callback': 'callback : (name: string) => void',
+    'Device.addSelectedPageObserver.callback': 'callback : (index: number) => void',
+    'Device.addActiveModulationSourceObserver.callback': 'callback : (name: string) => void',
+    'Device.addPageNamesObserver.callback': 'callback : (name: string) => void',
+    'Device.addPresetNamesObserver.callback': 'callback : (names: string[]) => void',
+    'Device.addPresetCategoriesObserver.callback': 'callback : (categories: string[]) => void',
+    'Device.addPresetCreatorsObserver.callback': 'callback : (creators: string[]) => void',
+    'Device.addIsEnabledObserver.callback': 'callback : (enabled: boolean) => void',
+    'Device.addSlotsObserver.callback': 'callback : (slotnames: string[]) => void',
+    'Device.addDirectParameterIdObserver.callback': 'callback : (parameterIds: string[]) => void',
+    'Device.addDirectParameterNameObserver.callback': 'callback : (id: string, name: string) => void',
+    'Device.addDirectParameterValueDisplayObserver.callback': 'callback : (id: string, valueDisplay: string) => void',
+    'Device.addDirectParameterNormalizedValueObserver.callback': 'callback : (id: string, value: number) => void',
+    'Device.addSampleNameObserver.callback': 'callback : (name: string) => void',
+    'DeviceBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'DeviceBank.addCanScrollUpObserver.callback': 'callback : (canScroll: boolean) => void',
+    'DeviceBank.addCanScrollDownObserver.callback': 'callback : (canScroll: boolean) => void',
+    'DeviceBank.addDeviceCountObserver.callback': 'callback : (count: number) => void',
+    'DeviceChain.addNameObserver.callback': 'callback : (name: string) => void',
+    'DeviceChain.addIsSelectedInEditorObserver.callback': 'callback : (selected: boolean) => void',
+    'GenericBrowsingSession.addNameObserver.callback': 'callback : (name: string) => void',
+    'Host.scheduleTask.callback': 'callback : (connection: RemoteConnection ) => void',
+    'Host.connectToRemoteHost.callback': 'callback : ( ) => void',
+    'Host.addDatagramPacketObserver.callback': 'callback : (data) => void',
+    'Macro.addLabelObserver.callback': 'callback : (name: string) => void',
+    'MidiIn.setSysexCallback.callback': 'callback : (data: string) => void',
+    'ModulationSource.addIsMappingObserver.callback': 'callback : (isMapping: boolean) => void',
+    'ModulationSource.addNameObserver.callback': 'callback : (name: string) => void',
+    'ModulationSource.addIsMappedObserver.callback': 'callback : (mapped: boolean) => void',
+    'NoteLane.addNoteValueObserver.callback': 'callback : (value: number) => void',
+    'NoteLane.addNameObserver.callback': 'callback : (name: string ) => void',
+    'NoteLane.addColorObserver.callback': 'callback : (red: number, green: number, blue: number) => void',
+    'PrimaryDevice.addCanSwitchToDeviceObserver.callback': 'callback : (canSwitch: boolean) => void',
+    'RangedValue.addValueObserver.callback': 'callback : (value: number) => void',
+    'RangedValue.addRawValueObserver.callback': 'callback : (value: number) => void',
+    'RemoteConnection.setDisconnectCallback.callback': 'callback : ( ) => void',
+    'RemoteConnection.setReceiveCallback.callback': 'callback : (data: number[]) => void',
+    'RemoteSocket.setClientConnectCallback.callback': 'callback : (connection: RemoteConnection) => void',
+    'Scene.addPositionObserver.callback': 'callback : (position: number) => void',
+    'Scene.addIsSelectedInEditorObserver.callback': 'callback : (selected: boolean) => void',
+    'SceneBank.addScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'SceneBank.addCanScrollUpObserver.callback': 'callback : (canScroll: boolean) => void',
+    'SceneBank.addCanScrollDownObserver.callback': 'callback : (canScroll: boolean) => void',
+    'SceneBank.addSceneCountObserver.callback': 'callback : (count: number) => void',
+    'Signal.addSignalObserver.callback': 'callback : ( ) => void',
+    'Track.addPositionObserver.callback': 'callback : (postion: number) => void',
+    'Track.addIsQueuedForStopObserver.callback': 'callback : (queued: boolean) => void',
+    'Track.addPitchNamesObserver.callback': 'callback : (key: number, name: string) => void',
+    'Track.addTrackTypeObserver.callback': 'callback : (type: string) => void',
+    'Track.addIsGroupObserver.callback': 'callback : (group: boolean) => void',
+    'TrackBank.addSceneScrollPositionObserver.callback': 'callback : (position: number) => void',
+    'TrackBank.addCanScrollScenesUpObserver.callback': 'callback : (canScroll: boolean) => void',
+    'TrackBank.addCanScrollScenesDownObserver.callback': 'callback : (canScroll: boolean) => void',
+    'TrackBank.addSceneCountObserver.callback': 'callback : (count: number) => void',
+    'Transport.addIsPlayingObserver.callback': 'callback : (playing: boolean) => void',
+    'Transport.addIsRecordingObserver.callback': 'callback : (recording: boolean) => void',
+    'Transport.addOverdubObserver.callback': 'callback : (overdub: boolean) => void',
+    'Transport.addLauncherOverdubObserver.callback': 'callback : (overdub: boolean) => void',
+    'Transport.addAutomationWriteModeObserver.callback': 'callback : (mode: string) => void',
+    'Transport.addIsWritingArrangerAutomationObserver.callback': 'callback : (writeEnabled: boolean) => void',
+    'Transport.addIsWritingClipLauncherAutomationObserver.callback': 'callback : (writingClipLauncher: boolean) => void',
+    'Transport.addAutomationOverrideObserver.callback': 'callback : (automationOverride: boolean) => void',
+    'Transport.addIsLoopActiveObserver.callback': 'callback : (loopActive: boolean) => void',
+    'Transport.addPunchInObserver.callback': 'callback : (enabled: boolean) => void',
+    'Transport.addPunchOutObserver.callback': 'callback : (enabled: boolean ) => void',
+    'Transport.addClickObserver.callback': 'callback : (active: boolean) => void',
+    'Transport.addMetronomeTicksObserver.callback': 'callback : (active: boolean) => void',
+    'Transport.addMetronomeVolumeObserver.callback': 'callback : (value: number) => void',
+    'Transport.addPreRollClickObserver.callback': 'callback : (enabled: boolean) => void',
+    'Transport.addPreRollObserver.callback': 'callback : (enabled: boolean) => void',
+    'Transport.addClipLauncherPostRecordingActionObserver.callback': 'callback : (status: string) => void',
+    'Value.addValueObserver.callback': 'callback : (value) => void',
+}
+
+functionPaths = {
+    'BooleanValue.toggle': 'exclusive?'
+}
+
+# Tokens of annotation lines in doc comments like "* @param {int} index the index"
+comment_token_pattern = re.compile(r'[^ .*=,();\n]+')
+# Tokens of prototype definitions like "Track.prototype.getClip = function(index) {};"
+definition_token_pattern = re.compile(r'[^ .=,(){};\n]+')
+non_word_pattern = re.compile(r'\W+')
+# Binary model files, see export_binary()
+model_magic = b'BWAPIMDL'
+model_format = 1
+# magic, format and number of classes
+model_header = struct.Struct('<8sII')
+# one per class, sorted by name: offset and length of the name, offset and length of the JSON record
+model_index_entry = struct.Struct('<IIII')
+
+brace_table = str.maketrans('', '', '{}')
+# Version in doc comments like "* @since Bitwig Studio 1.1"
+since_pattern = re.compile(r'@since\s+(?:Bitwig Studio\s+)?([\w.]+)')
+# References of the index file like '/// <reference path="Track.d.ts" />'
+reference_pattern = re.compile(r'^/// <reference path="([^"/\\]+)" />$', re.MULTILINE)
+
+# Java types of the stub annotations that are named differently in Typescript
+type_names = {
+    'function': '() => void',
+    'byte[]': 'number[]',
+    'int': 'number',
+    'double': 'number',
+    'long': 'number',
+    'byte': 'number',
+}
+
+
+def find_since(lines):
+    """
+    Returns the version of the first @since tag in the comment lines, or None.
+    """
+    for line in lines:
+        if '@since' in line:
+            match = since_pattern.search(line)
+            if match:
+                return match.group(1)
+    return None
+
+
+class Parameter:
+    __slots__ = ('__name', '__type')
+
+    def __init__(self, name, type=None):
+        self.__name = name
+        self.__type = type
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def type_str(self):
+        return self.__type
+
+    @property
+    def type(self):
+        return type_names.get(self.__type, self.__type)
+
+    def to_json(self):
+        if self.__type is None:
+            return {'name': self.__name}
+        return {'name': self.__name, 'type': self.__type}
+
+
+def class_chain(supers, class_name):
+    """
+    Returns class_name followed by the classes it extends, nearest first, from a dict of
+    class names to the name of the class they extend.
+    """
+    chain = []
+    while class_name and class_name not in chain:
+        chain.append(class_name)
+        class_name = supers.get(class_name)
+    return tuple(chain)
+
+
+class TypeResolver:
+    """
+    Index of the Typescript signatures that replace what the stubs declare. Callback
+    parameters and whole parameter lists are looked up by class and method name. A callback
+    parameter without an entry of its own class uses the entry of the nearest class it
+    extends, as long as the stub does not give it a more specific type than function.
+
+    The index is built from parameterPaths, functionPaths and type_names, a JSON file with
+    the keys "parameters", "functions" and "types" can add to or replace entries. A null
+    parameter signature leaves the parameter out.
+    """
+
+    def __init__(self, parameters=parameterPaths, functions=functionPaths, types=type_names):
+        self.__parameters = {}
+        self.__functions = {}
+        self.__types = {}
+        self.__supers = {}
+        self.__unresolved = {}
+        self.add(parameters, functions, types)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Returns a resolver with the built-in signatures and the ones from a JSON file.
+        """
+        resolver = cls()
+        with open(filename) as file:
+            data = json.load(file)
+        resolver.add(data.get('parameters', {}), data.get('functions', {}), data.get('types', {}))
+        return resolver
+
+    def add(self, parameters=None, functions=None, types=None):
+        for path, signature in (parameters or {}).items():
+            class_name, method_name, param_name = path.split('.', 2)
+            # parameterPaths marks parameters that are left out with -1
+            if signature == -1:
+                signature = None
+            self.__parameters.setdefault((class_name, method_name), {})[param_name] = signature
+        for path, signature in (functions or {}).items():
+            class_name, method_name = path.split('.', 1)
+            self.__functions[class_name, method_name] = signature
+        self.__types.update(types or {})
+
+    def to_json(self):
+        """
+        Returns the index in the format read by load().
+        """
+        parameters = {}
+        for (class_name, method_name), entries in self.__parameters.items():
+            for param_name, signature in entries.items():
+                parameters[class_name + '.' + method_name + '.' + param_name] = signature
+        functions = {class_name + '.' + method_name: signature
+                     for (class_name, method_name), signature in self.__functions.items()}
+        return {'parameters': parameters, 'functions': functions, 'types': self.__types}
+
+    def set_supers(self, supers):
+        """
+        Sets the class hierarchy used for lookups, a dict from class name to the name
+        of the class it extends.
+        """
+        self.__supers = dict(supers)
+
+    def chain(self, class_name):
+        """
+        Returns class_name followed by the classes it extends, nearest first.
+        """
+        return class_chain(self.__supers, class_name)
+
+    def type(self, java_type):
+        return self.__types.get(java_type, java_type)
+
+    def function(self, class_name, method_name):
+        """
+        Returns the complete parameter list of a method from the index, or None. These
+        replace what the stub of the class itself declares, so they are not inherited.
+        """
+        return self.__functions.get((class_name, method_name))
+
+    def parameter(self, class_name, method_name, parameter):
+        """
+        Returns the rendered parameter, or None if it is left out.
+        """
+        entries = self.__parameters.get((class_name, method_name))
+        if entries is not None and parameter.name in entries:
+            return entries[parameter.name]
+        if parameter.type_str is None or parameter.type_str == 'function':
+            for name in self.chain(class_name)[1:]:
+                entries = self.__parameters.get((name, method_name))
+                if entries is not None and parameter.name in entries:
+                    return entries[parameter.name]
+        if parameter.type_str == 'function':
+            self.__unresolved[class_name + '.' + method_name + '.' + parameter.name] = True
+        type = self.type(parameter.type_str)
+        if type:
+            return parameter.name + " : " + type
+        return parameter.name
+
+    @property
+    def unresolved(self):
+        """
+        Paths of the callback parameters that were rendered without a signature.
+        """
+        return list(self.__unresolved)
+
+
+# Used by render() when no resolver is given, it has no class hierarchy
+default_resolver = TypeResolver()
+
+
+class Method:
+    __slots__ = ('__name', '__class_name', '__parameters', '__constructor', '__returntype', '__lines')
+
+    def __init__(self, className, deflist, comment):
+        parameters = []
+        # the class the method is declared on, callback signatures are looked up for it
+        self.__class_name = className
+        self.__constructor = False
+        self.__name = sys.intern(deflist[2])
+        self.__returntype = comment.get_return_type()
+        self.__lines = comment.get_comments()
+        if self.__name == 'constructor':
+            self.__constructor = True
+            first = 3
+        else:
+            first = 4
+        for idx in range(first, len(deflist)):
+            parameters.append(Parameter(sys.intern(deflist[idx]), comment.get_type(deflist[idx])))
+        self.__parameters = tuple(parameters)
+
+    def is_constructor(self):
+        return self.__constructor
+
+    def constr_param(self):
+        if self.__constructor and len(self.__parameters) > 0:
+            return self.__parameters[0].name
+        return None
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def parameters(self):
+        return self.__parameters
+
+    @property
+    def return_type(self):
+        return self.__returntype
+
+    @property
+    def since(self):
+        return find_since(self.__lines)
+
+    def to_json(self, with_comments=True):
+        """
+        Returns the method as a dict of JSON types, with the types as declared in the stub.
+        """
+        model = {'name': self.__name, 'parameters': [parameter.to_json() for parameter in self.__parameters]}
+        if self.__returntype:
+            model['return_type'] = self.__returntype
+        since = self.since
+        if since:
+            model['since'] = since
+        if with_comments:
+            model['comment'] = list(self.__lines)
+        return model
+
+    def render(self, out, with_comments=True, with_types=True, resolver=None):
+        """
+        Appends the rendered method to the list of string chunks out. The signatures of
+        callback parameters are taken from resolver, by default from parameterPaths.
+        """
+        if resolver is None:
+            resolver = default_resolver
+        if not self.__constructor:
+            if with_comments:
+                for cl in self.__lines:
+                    out.append("    " + cl + "\n")
+
+            out.append("     " + self.__name + "(")
+            if with_types:
+                signature = resolver.function(self.__class_name, self.__name)
+                if signature is None:
+                    params = (resolver.parameter(self.__class_name, self.__name, parameter)
+                              for parameter in self.__parameters)
+                    signature = ", ".join(param for param in params if param is not None)
+                out.append(signature)
+                returntype = resolver.type(self.__returntype)
+                if returntype:
+                    out.append(") : " + returntype)
+                else:
+                    out.append(") : void")
+            else:
+                out.append(", ".join(parameter.name for parameter in self.__parameters))
+                out.append(")")
+
+
+class Comment:
+    __slots__ = ('__return_type', '__paramDict', '__lines', '__closed')
+
+    def __init__(self):
+        self.__return_type = None
+        self.__paramDict = {}
+        self.__lines = []
+        self.__closed = False
+
+    def set_return_type(self, type):
+        self.__return_type = sys.intern(type.translate(brace_table))
+
+    def get_return_type(self):
+        return self.__return_type
+
+    def register_type(self, type, paramname):
+        self.__paramDict[paramname] = sys.intern(type.translate(brace_table))
+
+    def parse_annotation(self, line):
+        """
+        Registers the type of a "@param {type} name" or "@return {type}" line. Only
+        looks at the first three tokens of the line.
+        """
+        tokens = []
+        for match in comment_token_pattern.finditer(line):
+            token = match.group()
+            if token.strip():
+                if not tokens and not token.startswith(('@return', '@param')):
+                    return
+                tokens.append(token)
+                if len(tokens) == 3:
+                    break
+        else:
+            return
+        if tokens[0].startswith('@return'):
+            self.set_return_type(tokens[1])
+        else:
+            self.register_type(tokens[1], tokens[2])
+
+    def get_type(self, param_name):
+        if param_name in self.__paramDict:
+            return self.__paramDict[param_name]
+        return None
+
+    def add_line(self, line):
+        if self.__closed:
+            # the lines were already handed out, leave them as they are
+            self.__lines = list(self.__lines)
+            self.__closed = False
+        # the same lines ("*", "@since Bitwig Studio 1.0", ...) recur in every stub and version
+        self.__lines.append(sys.intern(line))
+
+    def close(self):
+        self.__lines = tuple(self.__lines)
+        self.__closed = True
+
+    def get_comments(self):
+        """
+        Returns the comment lines as a tuple. Once the comment is closed the tuple is shared
+        by every method the comment documents instead of being copied for each of them.
+        """
+        if self.__closed:
+            return self.__lines
+        return tuple(self.__lines)
+
+
+def declared_class(sline):
+    """
+    Returns the class name of a line like "function Track() {}", or None.
+    """
+    m = non_word_pattern.split(sline, 2)
+    if len(m) > 1:
+        return m[1]
+    return None
+
+
+def definition_tokens(sline):
+    return [s for s in definition_token_pattern.findall(sline) if s.strip()]
+
+
+def extended_class(tokens):
+    """
+    Returns the class extended by a line like "Track.prototype = new Channel();" from its
+    definition tokens, or None.
+    """
+    if len(tokens) > 3:
+        return tokens[3]
+    return None
+
+
+class ClassParser:
+    """
+    Parses the lines of a stub file into a class model, which does not change after parsing.
+    """
+    __slots__ = ('__fileName', '__methods', '__className', '__super', '__class_comment', '__failed_lines')
+
+    def __init__(self, lines, filename):
+        self.__fileName = filename
+        self.__className = None
+        self.__super = None
+        self.__class_comment = ()
+        self.__failed_lines = 0
+        methods = []
+        funcdef = None
+        constrdef = None
+
+        in_comment_mode = False
+        current_comment = None
+        add_comment_line = None
+
+        for line in lines:
+            sline = line.strip()
+            kind = sline[:1]
+            if kind == '/' and sline.startswith('/**'):
+                in_comment_mode = True
+                current_comment = Comment()
+                add_comment_line = current_comment.add_line
+                add_comment_line(sline)
+                continue
+            if kind == '*' and sline.startswith('*/'):
+                add_comment_line(sline)
+                current_comment.close()
+                in_comment_mode = False
+                continue
+            if in_comment_mode:
+                add_comment_line(sline)
+                if '@param' in sline or '@return' in sline:
+                    current_comment.parse_annotation(sline)
+            # definitions start with a word character, so blank lines and comment lines are done here
+            if kind in '/*':
+                continue
+            if kind == 'v' and sline.startswith('var'):
+                # print " ###### " + line
+                pass
+            elif kind == 'f' and sline.startswith('function'):
+                # print line
+                class_name = declared_class(sline)
+                if class_name is not None:
+                    self.__className = class_name
+                    funcdef = class_name + '.prototype.'
+                    constrdef = class_name + '.prototype'
+                    self.__class_comment = current_comment.get_comments()
+                    # print "[" + self.__className + "]"
+            elif constrdef and line.startswith(constrdef):
+                lineArray = definition_tokens(sline)
+                if self.__className and line.startswith(funcdef):
+                    if len(lineArray) > 3:
+                        method = Method(self.__className, lineArray, current_comment)
+                        if not method.is_constructor():
+                            methods.append(method)
+                    else:
+                        self.__failed_lines += 1
+                else:
+                    super_name = extended_class(lineArray)
+                    if super_name is not None:
+                        self.__super = super_name
+        self.__methods = tuple(methods)
+
+    @property
+    def name(self):
+        return self.__className
+
+    @property
+    def filename(self):
+        return self.__fileName
+
+    @property
+    def super(self):
+        return self.__super
+
+    @property
+    def methods(self):
+        return self.__methods
+
+    @property
+    def failed_lines(self):
+        """
+        Number of prototype lines of the class that could not be parsed into a method.
+        """
+        return self.__failed_lines
+
+    @property
+    def since(self):
+        return find_since(self.__class_comment)
+
+    def to_json(self, with_comments=True):
+        """
+        Returns the class model as a dict of JSON types, see export_json().
+        """
+        model = {'name': self.__className}
+        if self.__super:
+            model['super'] = self.__super
+        if self.__fileName:
+            model['file'] = self.__fileName
+        since = self.since
+        if since:
+            model['since'] = since
+        if with_comments:
+            model['comment'] = list(self.__class_comment)
+        model['methods'] = [method.to_json(with_comments) for method in self.__methods]
+        return model
+
+    def render(self, out, with_comments=True, with_types=True, resolver=None):
+        """
+        Appends the rendered interface to the list of string chunks out. The signatures of
+        callback parameters are taken from resolver, by default from parameterPaths.
+        """
+        if not self.name:
+            return
+        if with_comments:
+            for cl in self.__class_comment:
+                out.append(cl + "\n")
+
+        out.append('interface ' + self.name)
+        if self.__super:
+            out.append(' extends ' + self.__super)
+        out.append(' {\n')
+        for idx, method in enumerate(self.__methods):
+            method.render(out, with_comments, with_types, resolver)
+            if idx < len(self.__methods) - 1:
+                out.append(",\n")
+        if with_comments:
+            out.append("\n")
+
+        out.append('}\n\n')
+
+
+# The parsed class model as returned by parse_stub()
+ClassModel = ClassParser
+
+
+def parse_stub(text, filename=None):
+    """
+    Parses the text of a single JavaScript stub file into its class model.
+    """
+    return ClassParser(io.StringIO(text), filename)
+
+
+def scan_class(lines):
+    """
+    Returns the class name of a stub and the name of the class it extends as ClassParser
+    finds them, but without parsing comments and methods.
+    """
+    name = super_name = None
+    funcdef = constrdef = None
+    for line in lines:
+        sline = line.strip()
+        if sline.startswith('var'):
+            continue
+        if sline.startswith('function'):
+            class_name = declared_class(sline)
+            if class_name is not None:
+                name = class_name
+                funcdef = class_name + '.prototype.'
+                constrdef = class_name + '.prototype'
+        elif constrdef and line.startswith(constrdef) and not (name and line.startswith(funcdef)):
+            extended = extended_class(definition_tokens(sline))
+            if extended is not None:
+                super_name = extended
+    return name, super_name
+
+
+def config_key():
+    """
+    Hash of every setting that influences the parsed class model. Changing one of them
+    invalidates all cache entries. Signatures and type names are resolved when rendering,
+    so they are not part of it.
+    """
+    return hashlib.sha1(repr((cache_version,)).encode('utf-8')).hexdigest()
+
+
+def load_cached(cache_file):
+    try:
+        with open(cache_file, 'rb') as file:
+            parser = pickle.load(file)
+        # the modification time tells prune_cache() when the entry was used last
+        utime(cache_file)
+        return parser
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # corrupt or outdated entry, just parse the stub again
+        return None
+
+
+def store_cached(cache_dir, cache_file, parser):
+    makedirs(cache_dir, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with open(fd, 'wb') as file:
+        pickle.dump(parser, file, pickle.HIGHEST_PROTOCOL)
+    replace(tmp_name, cache_file)
+
+
+def prune_cache(cache_dir, limit=cache_limit):
+    """
+    Removes the least recently used class models until at most limit are left in cache_dir.
+    """
+    if not cache_dir:
+        return
+    try:
+        with scandir(cache_dir) as entries:
+            cached = [entry for entry in entries if entry.name.endswith('.pickle')]
+    except FileNotFoundError:
+        return
+    if len(cached) <= limit:
+        return
+    cached = sorted((entry.stat().st_mtime_ns, entry.path) for entry in cached)
+    for _, path in cached[:len(cached) - limit]:
+        try:
+            remove(path)
+        except FileNotFoundError:
+            # removed by another run at the same time
+            pass
+
+
+def user_cache_dir():
+    """
+    Returns the cache directory of the current user used by --cache.
+    """
+    if platform == 'win32':
+        base = environ.get('LOCALAPPDATA') or expanduser('~')
+    elif platform == 'darwin':
+        base = join(expanduser('~'), 'Library', 'Caches')
+    else:
+        base = environ.get('XDG_CACHE_HOME') or join(expanduser('~'), '.cache')
+    return join(base, cache_name)
+
+
+def stub_digest(cache_config, filename, content):
+    """
+    Key of the class model of a stub, the same stub parsed with the same settings always
+    gets the same key.
+    """
+    digest = hashlib.sha1(cache_config.encode('utf-8'))
+    digest.update(filename.encode('utf-8') + b'\0')
+    digest.update(content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_stub(stub, cache_dir=None, cache_config=None):
+    """
+    Parses a (filename, content) tuple of a stub file, or takes its class model from the cache.
+    """
+    filename, content = stub
+    cache_file = None
+    if cache_dir:
+        cache_file = join(cache_dir, stub_digest(cache_config, filename, content) + '.pickle')
+        parser = load_cached(cache_file)
+        if parser is not None:
+            return parser
+    parser = parse_stub(content, filename)
+    if cache_file:
+        store_cached(cache_dir, cache_file, parser)
+    return parser
+
+
+def load_stub_timed(read, cache_dir=None, cache_config=None):
+    """
+    Like load_stub(), but takes a (stub, seconds) tuple from read_stubs() and returns the
+    class model together with the seconds spent reading and parsing the stub.
+    """
+    stub, read_time = read
+    start = time.perf_counter()
+    parser = load_stub(stub, cache_dir, cache_config)
+    return parser, read_time, time.perf_counter() - start
+
+
+@contextmanager
+def atomic_open(filename, mode='w'):
+    """
+    Opens a temporary file next to filename for writing and renames it over filename once
+    the block is done, so an interrupted run never leaves a truncated file behind.
+    """
+    directory = dirname(abspath(filename))
+    while True:
+        tmp_name = join(directory, '.' + basename(filename) + '.' + urandom(6).hex() + '.tmp')
+        try:
+            # the same mode open() uses, so the umask applies and not the 0o600 of mkstemp
+            fd = open_fd(tmp_name, O_WRONLY | O_CREAT | O_EXCL | O_BINARY, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with open(fd, mode) as file:
+            yield file
+        replace(tmp_name, filename)
+    except BaseException:
+        remove(tmp_name)
+        raise
+
+
+def write_atomic(filename, content):
+    with atomic_open(filename) as file:
+        file.write(content)
+
+
+def write_if_changed(filename, content):
+    """
+    Writes content to filename unless the file already has the same content hash, so an
+    unchanged file keeps its modification time. Returns whether the file was written.
+    """
+    try:
+        with open(filename) as file:
+            old_digest = hashlib.sha1(file.read().encode('utf-8')).digest()
+    except (FileNotFoundError, UnicodeDecodeError):
+        old_digest = None
+    if old_digest == hashlib.sha1(content.encode('utf-8')).digest():
+        return False
+    write_atomic(filename, content)
+    return True
+
+
+@contextmanager
+def open_output(out_path, shard=False):
+    """
+    Yields a function that takes the class model and the rendered interface of a stub.
+    The interfaces are written into the definition file out_path, or with shard one file
+    per interface into the directory out_path, next to an index file that references them
+    all. Interface files that did not change are left alone and interface files of classes
+    that no longer exist are removed.
+    """
+    if not shard:
+        with atomic_open(out_path) as file:
+            file.write(head)
+            yield lambda parser, interface: file.write(interface)
+        return
+
+    makedirs(out_path, exist_ok=True)
+    index_path = join(out_path, index_filename)
+    try:
+        with open(index_path) as file:
+            previous = set(reference_pattern.findall(file.read()))
+    except FileNotFoundError:
+        previous = set()
+    shards = []
+    written = set()
+
+    def write(parser, interface):
+        name = parser.name
+        if not name:
+            return
+        shard_name = name + '.d.ts'
+        if shard_name in written or shard_name == index_filename:
+            # two stubs declaring the same class, named after the stub so the name stays the
+            # same when other stubs are added or removed
+            shard_name = name + '.' + splitext(basename(parser.filename or ''))[0] + '.d.ts'
+        shards.append(shard_name)
+        written.add(shard_name)
+        write_if_changed(join(out_path, shard_name), interface)
+
+    yield write
+    # triple-slash references are only honoured before the first statement
+    write_if_changed(index_path, "".join('/// <reference path="' + shard_name + '" />\n' for shard_name in shards)
+                     + "\n" + head)
+    for shard_name in previous - written:
+        if isfile(join(out_path, shard_name)):
+            remove(join(out_path, shard_name))
+
+
+def list_stubs(stub_dir):
+    """
+    Returns the stub files of stub_dir sorted by name, so the interfaces come out in the
+    same order on every file system. The stubs are named after their class.
+    """
+    return sorted(f for f in listdir(stub_dir) if isfile(join(stub_dir, f)))
+
+
+def read_stub(stub_dir, filename):
+    start = time.perf_counter()
+    with open(join(stub_dir, filename)) as file:
+        content = file.read()
+    return (filename, content), time.perf_counter() - start
+
+
+def read_stubs(stub_dir, filelist, threads=io_threads):
+    """
+    Yields a ((filename, content), seconds) tuple for every stub in filelist, in filelist
+    order. Up to threads stubs are read at the same time, but only twice as many are read
+    ahead of the consumer, so a slow consumer does not pull the whole directory into memory.
+    """
+    if threads <= 1:
+        for f in filelist:
+            yield read_stub(stub_dir, f)
+        return
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque()
+        for f in filelist:
+            pending.append(pool.submit(read_stub, stub_dir, f))
+            if len(pending) >= 2 * threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def scan_hierarchy(stubs):
+    """
+    Returns the class hierarchy of (filename, content) tuples of stubs as a dict from class
+    name to the name of the class it extends, see scan_class().
+    """
+    supers = {}
+    for _, content in stubs:
+        name, super_name = scan_class(io.StringIO(content))
+        if name:
+            supers[name] = super_name
+    return supers
+
+
+def load_parsers(load, stubs):
+    return [load(stub) for stub in stubs]
+
+
+def parse_stubs(load, stubs, jobs=1, chunksize=8, pool=None):
+    """
+    Yields the class models of stubs, an iterable of whatever load takes, in order. With
+    jobs other than 1 the stubs are parsed in a process pool, but only a few chunks per
+    worker are parsed ahead of the consumer, so finished class models do not pile up in
+    memory.
+    """
+    if jobs == 1:
+        for stub in stubs:
+            yield load(stub)
+        return
+    workers = jobs or cpu_count() or 1
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from parse_stubs(load, stubs, jobs, chunksize, pool)
+        return
+    stubs = iter(stubs)
+    pending = deque()
+    while True:
+        chunk = list(islice(stubs, chunksize))
+        if not chunk:
+            break
+        pending.append(pool.submit(load_parsers, load, chunk))
+        if len(pending) >= 2 * workers:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process or of one of its finished worker
+    processes in bytes, or None where that is not available.
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, the other systems kilobytes
+    return peak if platform == 'darwin' else peak * 1024
+
+
+class TimedResolver:
+    """
+    Passes lookups on to a TypeResolver and adds up the time spent in them.
+    """
+
+    def __init__(self, resolver):
+        self.__resolver = resolver
+        self.seconds = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.__resolver, name)
+
+    def function(self, class_name, method_name):
+        start = time.perf_counter()
+        signature = self.__resolver.function(class_name, method_name)
+        self.seconds += time.perf_counter() - start
+        return signature
+
+    def parameter(self, class_name, method_name, parameter):
+        start = time.perf_counter()
+        signature = self.__resolver.parameter(class_name, method_name, parameter)
+        self.seconds += time.perf_counter() - start
+        return signature
+
+    def type(self, java_type):
+        start = time.perf_counter()
+        type = self.__resolver.type(java_type)
+        self.seconds += time.perf_counter() - start
+        return type
+
+
+class ConversionStats:
+    """
+    Time spent per phase of a conversion, the slowest stubs and the problems found, filled
+    in by convert(). Reading, parsing, type resolution and rendering are added up over all
+    stubs; stubs are read by several threads and with several jobs also parsed in parallel,
+    so their sum can exceed the total. Type resolution includes reading the stubs for the
+    class hierarchy, rendering includes writing the output.
+    """
+    phase_names = ('listing', 'reading', 'parsing', 'type resolution', 'rendering')
+
+    def __init__(self, slowest=10):
+        self.__phases = dict.fromkeys(self.phase_names, 0.0)
+        self.__slowest = []
+        self.__slowest_count = slowest
+        self.__stub_count = 0
+        self.__failed_lines = 0
+        self.__unresolved = 0
+        self.__total = 0.0
+        self.__peak_memory = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__phases[name] += time.perf_counter() - start
+
+    def add_stub(self, parser, read, parse, resolve, render):
+        self.__phases['reading'] += read
+        self.__phases['parsing'] += parse
+        self.__phases['type resolution'] += resolve
+        self.__phases['rendering'] += render
+        self.__stub_count += 1
+        self.__failed_lines += parser.failed_lines
+        # only the slowest stubs are kept, however many there are
+        entry = (read + parse + resolve + render, parser.filename)
+        if len(self.__slowest) < self.__slowest_count:
+            heapq.heappush(self.__slowest, entry)
+        elif self.__slowest and entry > self.__slowest[0]:
+            heapq.heapreplace(self.__slowest, entry)
+
+    def finish(self, resolver, total):
+        self.__unresolved = len(resolver.unresolved)
+        self.__total = total
+        self.__peak_memory = peak_memory()
+
+    def to_json(self):
+        return {
+            'stubs': self.__stub_count,
+            'total': self.__total,
+            'phases': dict(self.__phases),
+            'slowest': [{'file': filename, 'seconds': seconds}
+                        for seconds, filename in sorted(self.__slowest, reverse=True)],
+            'unresolved_callbacks': self.__unresolved,
+            'failed_prototype_lines': self.__failed_lines,
+            'peak_memory': self.__peak_memory,
+        }
+
+    def print_table(self):
+        print("  %-32s %10s" % ('phase', 'ms'))
+        for name, seconds in self.__phases.items():
+            print("  %-32s %10.1f" % (name, seconds * 1000))
+        print("  %-32s %10.1f" % ('total', self.__total * 1000))
+        print()
+        print("  %-32s %10s" % ('slowest stubs', 'ms'))
+        for seconds, filename in sorted(self.__slowest, reverse=True):
+            print("  %-32s %10.1f" % (filename, seconds * 1000))
+        print()
+        print("  %-32s %10d" % ('stubs', self.__stub_count))
+        print("  %-32s %10d" % ('unresolved callbacks', self.__unresolved))
+        print("  %-32s %10d" % ('failed prototype lines', self.__failed_lines))
+        if self.__peak_memory is not None:
+            print("  %-32s %10.1f" % ('peak memory MiB', self.__peak_memory / 1048576))
+
+
+def convert(stub_dir, out_path, *, with_comments=with_comments, with_types=with_types, jobs=1, cache_dir=None,
+            resolver=None, shard=False, stats=None, threads=io_threads):
+    """
+    Converts all stubs in stub_dir into the Typescript definition file out_path, or with
+    shard into one definition file per interface in the directory out_path. Timings and
+    counts of the run are added to stats, a ConversionStats, if given.
+    The stubs are read by threads at a time and parsed as they arrive. With jobs other than
+    1 they are parsed in a process pool, 0 uses one process per CPU. The interfaces are
+    written in the order of the stub names. Callback signatures are taken from resolver, by
+    default from parameterPaths. They can be inherited, so with types the stubs are read
+    twice, first only for the names of the classes and the classes they extend. Each
+    interface is written as soon as its stub is parsed, so memory use depends on the largest
+    stub and not on the size of the whole API.
+    """
+    start = time.perf_counter()
+    with stats.phase('listing') if stats is not None else nullcontext():
+        filelist = list_stubs(stub_dir)
+    if resolver is None:
+        resolver = TypeResolver()
+    if with_types:
+        # inherited signatures need the whole hierarchy before the first interface is rendered
+        with stats.phase('type resolution') if stats is not None else nullcontext():
+            resolver.set_supers(scan_hierarchy(stub for stub, _ in read_stubs(stub_dir, filelist, threads)))
+    load = partial(load_stub_timed, cache_dir=cache_dir, cache_config=config_key())
+    render_resolver = TimedResolver(resolver) if stats is not None else resolver
+
+    with open_output(out_path, shard) as write:
+        for p, read, parse in parse_stubs(load, read_stubs(stub_dir, filelist, threads), jobs):
+            render_start = time.perf_counter()
+            chunks = []
+            p.render(chunks, with_comments, with_types, render_resolver)
+            write(p, "".join(chunks))
+            if stats is not None:
+                resolve, render_resolver.seconds = render_resolver.seconds, 0.0
+                stats.add_stub(p, read, parse, resolve, time.perf_counter() - render_start - resolve)
+    prune_cache(cache_dir)
+    if stats is not None:
+        stats.finish(resolver, time.perf_counter() - start)
+
+
+def convert_batch(versions, *, with_comments=with_comments, with_types=with_types, jobs=1, cache_dir=None,
+                  resolver=None, shard=False, threads=io_threads):
+    """
+    Converts the stubs of several API versions in one go. versions is a list of
+    (stub_dir, out_path) tuples, with shard out_path is a directory as for convert(). A stub
+    that is byte-identical to a stub of a version converted before is not parsed again, and
+    not rendered again unless the classes it extends changed. Its class model and interface
+    are kept in memory for the whole batch.
+    With several jobs one process pool serves all versions, and one resolver indexes the
+    signatures for all of them.
+    """
+    cache_config = config_key()
+    load = partial(load_stub, cache_dir=cache_dir, cache_config=cache_config)
+    if resolver is None:
+        resolver = TypeResolver()
+    parsers = {}
+    interfaces = {}
+
+    with ProcessPoolExecutor(max_workers=jobs or cpu_count() or 1) if jobs != 1 else nullcontext() as pool:
+        for stub_dir, out_path in versions:
+            digests = []
+            new_stubs = {}
+            for stub, _ in read_stubs(stub_dir, list_stubs(stub_dir), threads):
+                digest = stub_digest(cache_config, *stub)
+                digests.append(digest)
+                if digest not in parsers:
+                    new_stubs[digest] = stub
+            parsers.update(zip(new_stubs, parse_stubs(load, list(new_stubs.values()), jobs, pool=pool)))
+            resolver.set_supers({parsers[digest].name: parsers[digest].super for digest in digests})
+
+            with open_output(out_path, shard) as write:
+                for digest in digests:
+                    key = (digest, resolver.chain(parsers[digest].name))
+                    if key not in interfaces:
+                        chunks = []
+                        parsers[digest].render(chunks, with_comments, with_types, resolver)
+                        interfaces[key] = "".join(chunks)
+                    write(parsers[digest], interfaces[key])
+    prune_cache(cache_dir)
+
+
+class StubWatcher:
+    """
+    Keeps the class model and the rendered interface of every stub in memory and only
+    re-parses the stubs that changed. Uses inotify when inotify_simple is installed and
+    polls the modification times of the stub directory otherwise.
+    """
+
+    def __init__(self, stub_dir, out_path, *, with_comments=with_comments, with_types=with_types,
+                 cache_dir=None, resolver=None, shard=False, threads=io_threads):
+        self.__stub_dir = stub_dir
+        self.__out_path = out_path
+        self.__shard = shard
+        self.__with_comments = with_comments
+        self.__with_types = with_types
+        self.__resolver = resolver or TypeResolver()
+        self.__cache_dir = cache_dir
+        self.__threads = threads
+        self.__load = partial(load_stub, cache_dir=cache_dir, cache_config=config_key())
+        self.__parsers = {}
+        self.__blocks = {}
+        self.__supers = {}
+        self.__snapshot = {}
+        self.__inotify = None
+        if INotify:
+            self.__inotify = INotify()
+            self.__inotify.add_watch(stub_dir, flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE)
+
+    def update(self, filenames):
+        """
+        Re-parses the given stubs and replaces their interface blocks. Stubs that no
+        longer exist are dropped from the document. When the class hierarchy changed all
+        interfaces are rendered again, since they may inherit signatures.
+        """
+        existing = []
+        for f in filenames:
+            if isfile(join(self.__stub_dir, f)):
+                existing.append(f)
+            elif f in self.__blocks:
+                del self.__parsers[f]
+                del self.__blocks[f]
+        try:
+            stubs = [stub for stub, _ in read_stubs(self.__stub_dir, existing, self.__threads)]
+        except OSError:
+            # a stub went away while it was read, read the others one by one
+            stubs = []
+            for f in existing:
+                try:
+                    stubs.append(read_stub(self.__stub_dir, f)[0])
+                except OSError as e:
+                    print("Failed to read " + f + ": " + str(e))
+        for stub in stubs:
+            f = stub[0]
+            try:
+                parser = self.__load(stub)
+            except Exception as e:
+                # the stub may be half saved, keep the last good interface until it changes again
+                print("Failed to parse " + f + ": " + str(e))
+                continue
+            self.__parsers[f] = parser
+            self.__blocks[f] = None
+        # every saved version of a stub adds a cache entry
+        prune_cache(self.__cache_dir)
+
+        supers = {parser.name: parser.super for parser in self.__parsers.values()}
+        if supers != self.__supers:
+            self.__supers = supers
+            self.__resolver.set_supers(supers)
+            self.__blocks = dict.fromkeys(self.__blocks)
+        for f, block in self.__blocks.items():
+            if block is None:
+                chunks = []
+                self.__parsers[f].render(chunks, self.__with_comments, self.__with_types, self.__resolver)
+                self.__blocks[f] = "".join(chunks)
+
+    def write(self):
+        with open_output(self.__out_path, self.__shard) as write:
+            for f in sorted(self.__blocks):
+                write(self.__parsers[f], self.__blocks[f])
+
+    def __scan(self):
+        snapshot = {}
+        with scandir(self.__stub_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait_for_changes(self, interval=1.0):
+        """
+        Blocks until at least one stub changed and returns the names of the changed stubs.
+        """
+        while True:
+            if self.__inotify:
+                events = self.__inotify.read(timeout=int(interval * 1000), read_delay=100)
+                changed = {event.name for event in events if event.name}
+            else:
+                time.sleep(interval)
+                snapshot = self.__scan()
+                changed = {f for f in snapshot.keys() | self.__snapshot.keys()
+                           if snapshot.get(f) != self.__snapshot.get(f)}
+                self.__snapshot = snapshot
+            if changed:
+                return changed
+
+    def run(self, interval=1.0):
+        """
+        Converts all stubs once and then rewrites the definition file whenever a stub changes.
+        """
+        self.__snapshot = self.__scan()
+        self.update(list_stubs(self.__stub_dir))
+        self.write()
+        print("Created Typescript definition File: " + output_name(self.__out_path, self.__shard))
+        while True:
+            changed = self.wait_for_changes(interval)
+            self.update(sorted(changed))
+            self.write()
+            print("Updated Typescript definition File: " + output_name(self.__out_path, self.__shard)
+                  + " (" + ", ".join(sorted(changed)) + ")")
+
+
+def export_model(stub_dir, *, json_path=None, binary_path=None, with_comments=with_comments, jobs=1,
+                 cache_dir=None, threads=io_threads):
+    """
+    Parses all stubs in stub_dir and writes the class models as JSON to json_path and in the
+    binary format to binary_path, either may be None.
+    """
+    load = partial(load_stub, cache_dir=cache_dir, cache_config=config_key())
+    stubs = (stub for stub, _ in read_stubs(stub_dir, list_stubs(stub_dir), threads))
+    classes = [p.to_json(with_comments) for p in parse_stubs(load, stubs, jobs) if p.name]
+    prune_cache(cache_dir)
+    if json_path:
+        export_json(classes, json_path)
+    if binary_path:
+        export_binary(classes, binary_path)
+
+
+def export_json(classes, filename):
+    """
+    Writes a list of class models as returned by ClassParser.to_json() into a compact JSON file.
+    """
+    with atomic_open(filename) as file:
+        json.dump({'format': model_format, 'classes': classes}, file, separators=(',', ':'))
+
+
+def export_binary(classes, filename):
+    """
+    Writes a list of class models as returned by ClassParser.to_json() into a file that
+    ModelIndex can look up classes in without reading the whole file. After the header
+    comes an index of fixed size entries sorted by class name, then the names and then one
+    compact JSON record per class.
+    """
+    records = sorted((c['name'].encode('utf-8'), json.dumps(c, separators=(',', ':')).encode('utf-8'))
+                     for c in classes)
+    names_offset = model_header.size + len(records) * model_index_entry.size
+    records_offset = names_offset + sum(len(name) for name, _ in records)
+    index = []
+    for name, record in records:
+        index.append(model_index_entry.pack(names_offset, len(name), records_offset, len(record)))
+        names_offset += len(name)
+        records_offset += len(record)
+    with atomic_open(filename, 'wb') as file:
+        file.write(model_header.pack(model_magic, model_format, len(records)))
+        file.write(b"".join(index))
+        file.write(b"".join(name for name, _ in records))
+        file.write(b"".join(record for _, record in records))
+
+
+class ModelIndex:
+    """
+    Read-only view of a binary model file written by export_binary(). The file is memory
+    mapped, a class is found by binary search over the name index and only its own record
+    is decoded.
+    """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.__count = model_header.unpack_from(self.__map)
+        except struct.error:
+            magic = version = None
+        if magic != model_magic or version != model_format:
+            self.__map.close()
+            raise ValueError(filename + " is not a binary API model of format " + str(model_format))
+
+    def __entry(self, idx):
+        return model_index_entry.unpack_from(self.__map, model_header.size + idx * model_index_entry.size)
+
+    def __name(self, idx):
+        offset, length, _, _ = self.__entry(idx)
+        return self.__map[offset:offset + length]
+
+    def __find(self, name):
+        key = name.encode('utf-8')
+        low, high = 0, self.__count
+        while low < high:
+            mid = (low + high) // 2
+            if self.__name(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.__count and self.__name(low) == key:
+            return low
+        return None
+
+    def __len__(self):
+        return self.__count
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __contains__(self, name):
+        return self.__find(name) is not None
+
+    def __getitem__(self, name):
+        idx = self.__find(name)
+        if idx is None:
+            raise KeyError(name)
+        _, _, offset, length = self.__entry(idx)
+        return json.loads(self.__map[offset:offset + length])
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def names(self):
+        """
+        Returns the class names in sorted order.
+        """
+        return [self.__name(idx).decode('utf-8') for idx in range(self.__count)]
+
+    def close(self):
+        self.__map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def index_stubs(stub_dir, cache_config, threads=io_threads):
+    """
+    Returns a dict from the digest of every stub in stub_dir to its (filename, content) tuple.
+    """
+    stubs = {}
+    for stub, _ in read_stubs(stub_dir, list_stubs(stub_dir), threads):
+        stubs[stub_digest(cache_config, *stub)] = stub
+    return stubs
+
+
+def method_signature(method):
+    """
+    Returns the signature of a method with the types as declared in the stub.
+    """
+    params = ", ".join(p.name + " : " + p.type_str if p.type_str else p.name for p in method.parameters)
+    return method.name + "(" + params + ") : " + (method.return_type or "void")
+
+
+def diff_classes(old, new):
+    """
+    Compares two class models of the same name. Returns a dict with the changed super class
+    and the added, removed and changed method signatures, or None if they are the same.
+    """
+    old_methods = {method.name: method_signature(method) for method in old.methods}
+    new_methods = {method.name: method_signature(method) for method in new.methods}
+    change = {}
+    if old.super != new.super:
+        change['super'] = [old.super, new.super]
+    added = [new_methods[name] for name in new_methods if name not in old_methods]
+    removed = [old_methods[name] for name in old_methods if name not in new_methods]
+    changed = [[old_methods[name], new_methods[name]] for name in new_methods
+               if name in old_methods and old_methods[name] != new_methods[name]]
+    if added:
+        change['added'] = added
+    if removed:
+        change['removed'] = removed
+    if changed:
+        change['changed'] = changed
+    return change or None
+
+
+def diff_stubs(old_dir, new_dir, *, patch_path=None, with_comments=with_comments, with_types=with_types, jobs=1,
+               cache_dir=None, resolver=None, threads=io_threads):
+    """
+    Compares the stubs of two API versions. Stubs that are byte-identical in both versions
+    are not parsed, the classes of the others are matched by name. Returns a dict with the
+    names of the added and removed classes and, for every changed class, the result of
+    diff_classes(). With patch_path the interfaces of the added and changed classes of the
+    new version are written into that file. With types these include the classes whose
+    own stub did not change but whose chain of super classes did, since they inherit
+    callback signatures along it.
+    """
+    cache_config = config_key()
+    load = partial(load_stub, cache_dir=cache_dir, cache_config=cache_config)
+    old_stubs = index_stubs(old_dir, cache_config, threads)
+    new_stubs = index_stubs(new_dir, cache_config, threads)
+    old_list = [stub for digest, stub in old_stubs.items() if digest not in new_stubs]
+    new_list = [stub for digest, stub in new_stubs.items() if digest not in old_stubs]
+
+    parsers = list(parse_stubs(load, old_list + new_list, jobs))
+    old_classes = {p.name: p for p in parsers[:len(old_list)] if p.name}
+    new_classes = {p.name: p for p in parsers[len(old_list):] if p.name}
+
+    diff = {
+        'added': sorted(name for name in new_classes if name not in old_classes),
+        'removed': sorted(name for name in old_classes if name not in new_classes),
+        'changed': {},
+    }
+    for name in sorted(new_classes):
+        if name in old_classes:
+            change = diff_classes(old_classes[name], new_classes[name])
+            if change:
+                diff['changed'][name] = change
+
+    if patch_path:
+        if resolver is None:
+            resolver = TypeResolver()
+        patched = set(diff['added']) | set(diff['changed'])
+        if with_types:
+            # the stubs of both versions are all in memory already
+            old_supers = scan_hierarchy(old_stubs.values())
+            new_supers = {}
+            owners = {}
+            for stub in new_stubs.values():
+                name, super_name = scan_class(io.StringIO(stub[1]))
+                if name:
+                    new_supers[name] = super_name
+                    owners[name] = stub
+            resolver.set_supers(new_supers)
+            for name in new_supers:
+                if name not in patched and class_chain(new_supers, name) != class_chain(old_supers, name):
+                    if name not in new_classes:
+                        new_classes[name] = load(owners[name])
+                    patched.add(name)
+        with atomic_open(patch_path) as file:
+            for name in sorted(patched):
+                chunks = []
+                new_classes[name].render(chunks, with_comments, with_types, resolver)
+                file.write("".join(chunks))
+    prune_cache(cache_dir)
+    return diff
+
+
+def print_diff(diff):
+    if not (diff['added'] or diff['removed'] or diff['changed']):
+        print("No differences in the interfaces")
+    for name in diff['added']:
+        print("+ interface " + name)
+    for name in diff['removed']:
+        print("- interface " + name)
+    for name, change in diff['changed'].items():
+        print("~ interface " + name)
+        if 'super' in change:
+            print("    extends " + str(change['super'][0]) + " -> " + str(change['super'][1]))
+        for signature in change.get('added', ()):
+            print("    + " + signature)
+        for signature in change.get('removed', ()):
+            print("    - " + signature)
+        for old, new in change.get('changed', ()):
+            print("    ~ " + old + " -> " + new)
+
+
+def output_name(out_path, shard=False):
+    """
+    Returns the file to load for out_path, the index file when writing one file per interface.
+    """
+    return join(out_path, index_filename) if shard else out_path
+
+
+def print_unresolved(resolver):
+    """
+    Prints the callback parameters without a signature as entries for parameterPaths.
+    """
+    for path in resolver.unresolved:
+        param_name = path.split('.', 2)[2]
+        print("    \'" + path + "' : '" + param_name + " : ( ) => void',")
+
+
+def job_count(value):
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError('must be 0 or more, not ' + value)
+    return jobs
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Converts the Bitwig Studio Controller API JavaScript stubs into a Typescript definition file.')
+    argparser.add_argument('stubs', nargs='?', default=stubspath,
+                           help='directory containing the JavaScript stubs, defaults to the Bitwig Studio installation')
+    argparser.add_argument('-o', '--output',
+                           help='Typescript definition file to create (default: %s, with --shard %s)'
+                                % (result_filename, result_dirname))
+    argparser.add_argument('--no-comments', dest='with_comments', action='store_false', default=with_comments,
+                           help='leave out the documentation comments')
+    argparser.add_argument('--no-types', dest='with_types', action='store_false', default=with_types,
+                           help='leave out parameter and return types')
+    argparser.add_argument('-j', '--jobs', type=job_count, default=1,
+                           help='number of processes parsing stubs in parallel, 0 uses one per CPU')
+    argparser.add_argument('--io-threads', type=int, default=io_threads,
+                           help='number of stubs read at the same time (default: %(default)s)')
+    argparser.add_argument('--cache', action='store_true',
+                           help='keep the parsed class models in the cache directory of the user and only parse '
+                                'stubs that changed since a previous run')
+    argparser.add_argument('--cache-dir', metavar='DIR', help='like --cache, but with the cache in DIR')
+    argparser.add_argument('-t', '--type-map', metavar='FILE',
+                           help='JSON file with callback signatures that add to or replace the built-in ones')
+    argparser.add_argument('--dump-type-map', metavar='FILE',
+                           help='write the callback signatures in use to a JSON file and exit')
+    argparser.add_argument('--export-json', metavar='FILE',
+                           help='write the parsed classes, methods and parameters to a compact JSON file and exit')
+    argparser.add_argument('--export-binary', metavar='FILE',
+                           help='write the parsed classes to a binary file with a name index that can be '
+                                'memory-mapped, see ModelIndex, and exit')
+    argparser.add_argument('-d', '--diff', metavar='OLD_STUBS',
+                           help='compare the stub directory OLD_STUBS with the stubs and print the added, removed '
+                                'and changed interfaces and methods instead of converting')
+    argparser.add_argument('--diff-json', metavar='FILE', help='with --diff also write the differences to a JSON file')
+    argparser.add_argument('--patch', metavar='FILE',
+                           help='with --diff write the added and changed interfaces into a Typescript file')
+    argparser.add_argument('-s', '--shard', action='store_true',
+                           help='treat OUTPUT as a directory and write one definition file per interface into it, '
+                                'together with an %s that references them all' % index_filename)
+    argparser.add_argument('--stats', action='store_true',
+                           help='print the time spent per phase, the slowest stubs, unresolved callbacks, failed '
+                                'prototype lines and peak memory of the conversion')
+    argparser.add_argument('--stats-json', metavar='FILE', help='write the statistics of --stats to a JSON file')
+    argparser.add_argument('-w', '--watch', action='store_true',
+                           help='keep running and update the definition file whenever a stub changes')
+    argparser.add_argument('-b', '--batch', nargs=2, action='append', metavar=('STUBS', 'OUTPUT'),
+                           help='convert the stub directory STUBS into OUTPUT, can be given once per API version '
+                                'to convert several versions in one run')
+    args = argparser.parse_args()
+    if args.output is None:
+        args.output = result_dirname if args.shard else result_filename
+    if args.cache and not args.cache_dir:
+        args.cache_dir = user_cache_dir()
+    if (args.stats or args.stats_json) and (args.batch or args.watch or args.diff or args.export_json
+                                            or args.export_binary):
+        argparser.error('--stats and --stats-json only apply to a single conversion')
+    resolver = TypeResolver.load(args.type_map) if args.type_map else TypeResolver()
+    if args.dump_type_map:
+        with atomic_open(args.dump_type_map) as file:
+            json.dump(resolver.to_json(), file, indent=4)
+        return
+    if args.diff:
+        if not args.stubs:
+            argparser.error('no default stub directory on this platform, please pass the stub directory')
+        diff = diff_stubs(args.diff, args.stubs, patch_path=args.patch, with_comments=args.with_comments,
+                          with_types=args.with_types, jobs=args.jobs, cache_dir=args.cache_dir, resolver=resolver,
+                          threads=args.io_threads)
+        print_diff(diff)
+        if args.diff_json:
+            with atomic_open(args.diff_json) as file:
+                json.dump(diff, file, indent=4)
+        if args.patch:
+            print("Created Typescript patch File: " + args.patch)
+        return
+    if args.export_json or args.export_binary:
+        if not args.stubs:
+            argparser.error('no default stub directory on this platform, please pass the stub directory')
+        export_model(args.stubs, json_path=args.export_json, binary_path=args.export_binary,
+                     with_comments=args.with_comments, jobs=args.jobs, cache_dir=args.cache_dir,
+                     threads=args.io_threads)
+        for filename in (args.export_json, args.export_binary):
+            if filename:
+                print("Created API model File: " + filename)
+        return
+    if args.batch:
+        if args.watch:
+            argparser.error('--watch can not be combined with --batch')
+        convert_batch(args.batch, with_comments=args.with_comments, with_types=args.with_types,
+                      jobs=args.jobs, cache_dir=args.cache_dir, resolver=resolver, shard=args.shard,
+                      threads=args.io_threads)
+        print_unresolved(resolver)
+        for _, out_path in args.batch:
+            print("Created Typescript definition File: " + output_name(out_path, args.shard))
+        return
+    if not args.stubs:
+        argparser.error('no default stub directory on this platform, please pass the stub directory')
+
+    if args.watch:
+        if args.jobs != 1:
+            argparser.error('--watch only re-parses the changed stubs and can not be combined with --jobs')
+        watcher = StubWatcher(args.stubs, args.output, with_comments=args.with_comments,
+                              with_types=args.with_types, cache_dir=args.cache_dir, resolver=resolver,
+                              shard=args.shard, threads=args.io_threads)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    stats = ConversionStats() if args.stats or args.stats_json else None
+    convert(args.stubs, args.output, with_comments=args.with_comments, with_types=args.with_types,
+            jobs=args.jobs, cache_dir=args.cache_dir, resolver=resolver, shard=args.shard, stats=stats,
+            threads=args.io_threads)
+    print_unresolved(resolver)
+    print("Created Typescript definition File: " + output_name(args.output, args.shard))
+    if args.stats:
+        stats.print_table()
+    if args.stats_json:
+        with atomic_open(args.stats_json) as file:
+            json.dump(stats.to_json(), file, indent=4)
+
+
+if __name__ == "__main__":
+    main()